@@ -1,4 +1,5 @@
-import time
+import html
+from functools import lru_cache
 from urllib.parse import urlparse
 
 import pandas as pd
@@ -17,9 +18,8 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Custom CSS for better styling
-st.markdown(
-    """
+# Custom CSS for better styling, built once at import time
+_CSS = """
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -55,11 +55,72 @@ st.markdown(
         margin: 0.5rem 0;
     }
 </style>
-""",
-    unsafe_allow_html=True,
-)
+"""
+
+_FOOTER = """
+<div style='text-align: center; color: #666; padding: 20px;'>
+    <p>ECom Intel - Powered by Firecrawl & OpenAI GPT-4o-mini</p>
+    <p>Analyze product reviews to get AI-powered insights and recommendations</p>
+</div>
+"""
+
+# st.html skips the markdown parser that st.markdown(..., unsafe_allow_html=True)
+# would run on every rerun
+st.html(_CSS)
+
+
+@st.cache_resource
+def get_db() -> ReviewDatabase:
+    """Open the review database once per process."""
+    return ReviewDatabase()
+
+
+@st.cache_resource
+def get_firecrawl() -> FirecrawlClient:
+    """Build the Firecrawl client once per process."""
+    return FirecrawlClient()
 
 
+@st.cache_resource
+def get_analyzer() -> ReviewAnalyzer:
+    """Build the review analyzer once per process."""
+    return ReviewAnalyzer()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_recent_products(
+    _db: ReviewDatabase, db_path: str, limit: int, version: int
+) -> pd.DataFrame:
+    """Load recent products, cached across reruns until the data changes.
+
+    `version` is bumped in session state whenever new results are saved so
+    stale cache entries are invalidated immediately instead of waiting for
+    the TTL to expire.
+    """
+    return _db.get_recent_products_df(limit)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def format_recent_products(df: pd.DataFrame) -> pd.DataFrame:
+    """Build the display DataFrame for the recent-analyses table."""
+    display_df = df[
+        ["title", "brand", "total_reviews", "average_rating", "created_at"]
+    ].rename(
+        columns={
+            "title": "Product",
+            "brand": "Brand",
+            "total_reviews": "Reviews",
+            "average_rating": "Rating",
+            "created_at": "Analyzed",
+        }
+    )
+    display_df["Rating"] = display_df["Rating"].round(2)
+    # 'Analyzed' stays a datetime column; formatting happens client-side
+    # via st.column_config.DatetimeColumn
+    return display_df
+
+
+@lru_cache(maxsize=256)
 def validate_url(url: str) -> bool:
     """Validate if the URL is properly formatted."""
     try:
@@ -69,6 +130,7 @@ def validate_url(url: str) -> bool:
         return False
 
 
+@lru_cache(maxsize=256)
 def extract_product_name(url: str) -> str:
     """Extract product name from URL."""
     try:
@@ -81,8 +143,13 @@ def extract_product_name(url: str) -> str:
         return "Unknown Product"
 
 
-def create_sentiment_chart(sentiment_data: dict) -> go.Figure:
-    """Create sentiment distribution pie chart."""
+@st.cache_resource(hash_funcs={dict: lambda d: tuple(sorted(d.items()))})
+def create_sentiment_chart(sentiment_data: dict) -> dict:
+    """Create sentiment distribution pie chart as a pre-serialized spec.
+
+    Returns the plotly-json dict rather than a Figure so reruns skip both
+    figure construction and Streamlit's JSON serialization.
+    """
     fig = go.Figure(
         data=[
             go.Pie(
@@ -96,11 +163,12 @@ def create_sentiment_chart(sentiment_data: dict) -> go.Figure:
     fig.update_layout(
         title="Sentiment Distribution", font=dict(size=14), showlegend=True, height=400
     )
-    return fig
+    return fig.to_plotly_json()
 
 
-def create_rating_chart(rating_data: dict) -> go.Figure:
-    """Create rating distribution bar chart."""
+@st.cache_resource(hash_funcs={dict: lambda d: tuple(sorted(d.items()))})
+def create_rating_chart(rating_data: dict) -> dict:
+    """Create rating distribution bar chart as a pre-serialized spec."""
     ratings = ["5★", "4★", "3★", "2★", "1★"]
     values = [
         rating_data.get("5_star", 0),
@@ -127,15 +195,131 @@ def create_rating_chart(rating_data: dict) -> go.Figure:
         yaxis_title="Percentage (%)",
         height=400,
     )
-    return fig
+    return fig.to_plotly_json()
+
+
+@st.fragment
+def render_results(analysis_result: dict, reviews: list):
+    """Render the analysis results panel.
+
+    Runs as a fragment so widget interactions inside it rerun only this
+    scope instead of re-executing the whole script.
+    """
+    st.markdown("---")
+    st.header("📊 Analysis Results")
+
+    # Key metrics
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Reviews", analysis_result["total_reviews"])
+    with col2:
+        st.metric("Average Rating", f"{analysis_result['average_rating']}/5.0")
+    with col3:
+        st.metric(
+            "Positive Sentiment",
+            f"{analysis_result['sentiment_distribution']['positive']}%",
+        )
+    with col4:
+        st.metric(
+            "Negative Sentiment",
+            f"{analysis_result['sentiment_distribution']['negative']}%",
+        )
+
+    # Charts
+    col1, col2 = st.columns(2)
+    with col1:
+        fig_sentiment = create_sentiment_chart(
+            analysis_result["sentiment_distribution"]
+        )
+        st.plotly_chart(fig_sentiment, width="stretch")
+    with col2:
+        fig_rating = create_rating_chart(analysis_result["rating_summary"])
+        st.plotly_chart(fig_rating, width="stretch")
+
+    # Key Insights — one markdown call per section; items are escaped since
+    # they come from LLM output
+    st.markdown("---")
+    st.header("💡 Key Insights")
+    if analysis_result.get("key_insights"):
+        st.markdown(
+            "".join(
+                f'<div class="insight-box">• {html.escape(str(insight))}</div>'
+                for insight in analysis_result.get("key_insights", [])
+            ),
+            unsafe_allow_html=True,
+        )
+    else:
+        st.info("No key insights available")
+
+    # Pros and Cons
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("✅ What Customers Love")
+        if analysis_result.get("pros"):
+            st.markdown(
+                "".join(
+                    f'<div class="insight-box">✓ {html.escape(str(pro))}</div>'
+                    for pro in analysis_result.get("pros", [])
+                ),
+                unsafe_allow_html=True,
+            )
+        else:
+            st.info("No positive feedback identified")
+
+    with col2:
+        st.subheader("⚠️ Common Complaints")
+        if analysis_result.get("cons"):
+            st.markdown(
+                "".join(
+                    f'<div class="warning-box">⚠ {html.escape(str(con))}</div>'
+                    for con in analysis_result.get("cons", [])
+                ),
+                unsafe_allow_html=True,
+            )
+        else:
+            st.info("No negative feedback identified")
+
+    # Recommendations
+    if analysis_result.get("recommendations"):
+        st.markdown("---")
+        st.header("🎯 Recommendations")
+        st.markdown(
+            "".join(
+                f'<div class="insight-box">💡 {html.escape(str(rec))}</div>'
+                for rec in analysis_result.get("recommendations", [])
+            ),
+            unsafe_allow_html=True,
+        )
+
+    # Recent Reviews Sample
+    if reviews:
+        st.markdown("---")
+        st.header("📝 Sample Reviews")
+        sample_reviews = reviews[:5]  # Show first 5 reviews
+
+        for i, review in enumerate(sample_reviews, 1):
+            with st.expander(f"Review {i} - Rating: {review.get('rating', 'N/A')}/5"):
+                st.write(f"**Review:** {review.get('review_text', 'N/A')}")
+                if review.get("reviewer_name"):
+                    st.write(f"**Reviewer:** {review.get('reviewer_name')}")
+                if review.get("review_date"):
+                    st.write(f"**Date:** {review.get('review_date')}")
+                if review.get("sentiment_label"):
+                    sentiment = review.get("sentiment_label", "neutral")
+                    sentiment_color = {
+                        "positive": "🟢",
+                        "negative": "🔴",
+                        "neutral": "🟡",
+                    }.get(sentiment, "⚪")
+                    st.write(f"**Sentiment:** {sentiment_color} {sentiment.title()}")
 
 
 def main():
-    # Initialize components
+    # Initialize components (cached, so reruns reuse the same instances)
     try:
-        db = ReviewDatabase()
-        firecrawl_client = FirecrawlClient()
-        analyzer = ReviewAnalyzer()
+        db = get_db()
+        firecrawl_client = get_firecrawl()
+        analyzer = get_analyzer()
     except Exception as e:
         st.error(f"⚠️ **Initialization Error**: {str(e)}")
         st.error(
@@ -143,6 +327,10 @@ def main():
         )
         return
 
+    # Version counter used to invalidate the recent-products cache on writes
+    if "data_version" not in st.session_state:
+        st.session_state.data_version = 0
+
     # Header
     st.markdown(
         '<h1 class="main-header">🔍 ECom Intel - Product Review Analyzer</h1>',
@@ -185,209 +373,84 @@ def main():
         cached_analysis = None
         if include_cached:
             with st.spinner("🔍 Checking for cached results..."):
-                # Try to find existing product in database
-                recent_products = db.get_recent_products(50)
-                for product in recent_products:
-                    if product["url"] == product_url:
-                        cached_analysis = db.get_analysis(product["id"])
-                        if cached_analysis:
-                            product_info = db.get_product_info(product["id"])
-                            reviews = db.get_reviews(product["id"])
-                            break
+                # Look up the product by URL directly (index-backed)
+                product_id = db.get_product_by_url(product_url)
+                if product_id:
+                    # Only the 5-review sample is displayed on cache hits
+                    bundle = db.get_cached_bundle(product_id, review_limit=5)
+                    if bundle:
+                        cached_analysis = bundle["analysis"]
+                        product_info = bundle["product_info"]
+                        reviews = bundle["reviews"]
 
         if cached_analysis:
             st.info("✅ Using cached results. Analysis completed in seconds!")
             analysis_result = cached_analysis
-            product_info = product_info
-            reviews = reviews
         else:
             # Perform fresh analysis
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-
             try:
-                # Step 1: Get product info
-                status_text.text("🔍 Searching for reviews...")
-                progress_bar.progress(20)
-                time.sleep(1)
-
-                # Step 2: Scrape reviews
-                status_text.text("📥 Scraping review content...")
-                progress_bar.progress(40)
-                reviews = firecrawl_client.get_product_reviews(product_url, max_pages)
-
-                if not reviews:
-                    st.error(
-                        "❌ No reviews found for this product. Please try a different URL."
+                with st.status("🔍 Analyzing reviews...", expanded=True) as status:
+                    status.update(
+                        label="📥 Scraping review content...", state="running"
+                    )
+                    reviews = firecrawl_client.get_product_reviews(
+                        product_url, max_pages
                     )
-                    return
-
-                status_text.text(f"📊 Found {len(reviews)} reviews")
-                progress_bar.progress(60)
-
-                # Step 3: Analyze reviews
-                status_text.text("🧠 Analyzing reviews with AI...")
-                progress_bar.progress(80)
-                analysis_result = analyzer.analyze_reviews(reviews)
 
-                # Step 4: Save to database
-                status_text.text("💾 Saving results...")
-                progress_bar.progress(90)
+                    if not reviews:
+                        status.update(label="❌ No reviews found", state="error")
+                        st.error(
+                            "❌ No reviews found for this product. Please try a different URL."
+                        )
+                        return
 
-                product_id = db.get_or_create_product(
-                    url=product_url, title=product_name
-                )
-                db.add_reviews(product_id, reviews)
-                db.save_analysis(product_id, analysis_result)
+                    st.write(f"📊 Found {len(reviews)} reviews")
+                    status.update(
+                        label="🧠 Analyzing reviews with AI...", state="running"
+                    )
+                    analysis_result = analyzer.analyze_reviews(reviews)
 
-                product_info = db.get_product_info(product_id)
+                    # Saving is fast; no separate status update needed
+                    product_id = db.get_or_create_product(
+                        url=product_url, title=product_name
+                    )
+                    db.add_reviews(product_id, reviews)
+                    db.save_analysis(product_id, analysis_result)
+                    st.session_state.data_version += 1
 
-                progress_bar.progress(100)
-                status_text.text("✅ Analysis complete!")
-                time.sleep(1)
+                    product_info = db.get_product_info(product_id)
 
-                # Clear progress indicators
-                progress_bar.empty()
-                status_text.empty()
+                    status.update(
+                        label="✅ Analysis complete!",
+                        state="complete",
+                        expanded=False,
+                    )
 
             except Exception as e:
                 st.error(f"❌ **Analysis Error**: {str(e)}")
                 return
 
-        # Display results
-        st.markdown("---")
-        st.header("📊 Analysis Results")
-
-        # Key metrics
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Total Reviews", analysis_result["total_reviews"])
-        with col2:
-            st.metric("Average Rating", f"{analysis_result['average_rating']}/5.0")
-        with col3:
-            st.metric(
-                "Positive Sentiment",
-                f"{analysis_result['sentiment_distribution']['positive']}%",
-            )
-        with col4:
-            st.metric(
-                "Negative Sentiment",
-                f"{analysis_result['sentiment_distribution']['negative']}%",
-            )
-
-        # Charts
-        col1, col2 = st.columns(2)
-        with col1:
-            fig_sentiment = create_sentiment_chart(
-                analysis_result["sentiment_distribution"]
-            )
-            st.plotly_chart(fig_sentiment, width="stretch")
-        with col2:
-            fig_rating = create_rating_chart(analysis_result["rating_summary"])
-            st.plotly_chart(fig_rating, width="stretch")
-
-        # Key Insights
-        st.markdown("---")
-        st.header("💡 Key Insights")
-        if analysis_result.get("key_insights"):
-            for insight in analysis_result.get("key_insights", []):
-                st.markdown(
-                    f'<div class="insight-box">• {insight}</div>',
-                    unsafe_allow_html=True,
-                )
-        else:
-            st.info("No key insights available")
-
-        # Pros and Cons
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("✅ What Customers Love")
-            if analysis_result.get("pros"):
-                for pro in analysis_result.get("pros", []):
-                    st.markdown(
-                        f'<div class="insight-box">✓ {pro}</div>',
-                        unsafe_allow_html=True,
-                    )
-            else:
-                st.info("No positive feedback identified")
-
-        with col2:
-            st.subheader("⚠️ Common Complaints")
-            if analysis_result.get("cons"):
-                for con in analysis_result.get("cons", []):
-                    st.markdown(
-                        f'<div class="warning-box">⚠ {con}</div>',
-                        unsafe_allow_html=True,
-                    )
-            else:
-                st.info("No negative feedback identified")
-
-        # Recommendations
-        if analysis_result.get("recommendations"):
-            st.markdown("---")
-            st.header("🎯 Recommendations")
-            for rec in analysis_result.get("recommendations", []):
-                st.markdown(
-                    f'<div class="insight-box">💡 {rec}</div>', unsafe_allow_html=True
-                )
-
-        # Recent Reviews Sample
-        if reviews:
-            st.markdown("---")
-            st.header("📝 Sample Reviews")
-            sample_reviews = reviews[:5]  # Show first 5 reviews
-
-            for i, review in enumerate(sample_reviews, 1):
-                with st.expander(
-                    f"Review {i} - Rating: {review.get('rating', 'N/A')}/5"
-                ):
-                    st.write(f"**Review:** {review.get('review_text', 'N/A')}")
-                    if review.get("reviewer_name"):
-                        st.write(f"**Reviewer:** {review.get('reviewer_name')}")
-                    if review.get("review_date"):
-                        st.write(f"**Date:** {review.get('review_date')}")
-                    if review.get("sentiment_label"):
-                        sentiment = review.get("sentiment_label", "neutral")
-                        sentiment_color = {
-                            "positive": "🟢",
-                            "negative": "🔴",
-                            "neutral": "🟡",
-                        }.get(sentiment, "⚪")
-                        st.write(
-                            f"**Sentiment:** {sentiment_color} {sentiment.title()}"
-                        )
+        render_results(analysis_result, reviews)
 
     # Recent Analyses
     st.markdown("---")
     st.header("🕐 Recent Analyses")
 
-    recent_products = db.get_recent_products(10)
-    if recent_products:
-        df = pd.DataFrame(recent_products)
-        df = df.copy()
-        df.loc[:, "average_rating"] = df["average_rating"].round(2)
-        display_df = df[
-            ["title", "brand", "total_reviews", "average_rating", "created_at"]
-        ]
-        display_df.columns = ["Product", "Brand", "Reviews", "Rating", "Analyzed"]
-        display_df.loc[:, "Analyzed"] = pd.to_datetime(
-            display_df["Analyzed"]
-        ).dt.strftime("%Y-%m-%d %H:%M")
-        st.dataframe(display_df, width="stretch")
+    recent_df = load_recent_products(db, db.db_path, 10, st.session_state.data_version)
+    if not recent_df.empty:
+        st.dataframe(
+            format_recent_products(recent_df),
+            width="stretch",
+            column_config={
+                "Analyzed": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm")
+            },
+        )
     else:
         st.info("No recent analyses found. Start by analyzing a product!")
 
     # Footer
     st.markdown("---")
-    st.markdown(
-        """
-    <div style='text-align: center; color: #666; padding: 20px;'>
-        <p>ECom Intel - Powered by Firecrawl & OpenAI GPT-4o-mini</p>
-        <p>Analyze product reviews to get AI-powered insights and recommendations</p>
-    </div>
-    """,
-        unsafe_allow_html=True,
-    )
+    st.html(_FOOTER)
 
 
 if __name__ == "__main__":
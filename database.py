@@ -1,18 +1,48 @@
 import sqlite3
-import json
+import orjson
+import threading
+import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Optional
 
 class ReviewDatabase:
     def __init__(self, db_path: str = "reviews.db"):
         self.db_path = db_path
+        # Single persistent connection: reconnecting per call pays lock/fsync
+        # setup on every query, and get_recent_products runs on every rerun.
+        self._conn = sqlite3.connect(
+            db_path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA temp_store=MEMORY')
+        self._conn.execute('PRAGMA mmap_size=268435456')
+        # Streamlit may re-enter from different script threads
+        self._lock = threading.Lock()
         self.init_database()
 
+    @contextmanager
+    def _transaction(self, immediate: bool = False):
+        """Yield a cursor inside an explicit transaction.
+
+        The connection is autocommit and lives for the whole process, so a
+        failed statement must roll back here; leaving the transaction open
+        would break every later write on this connection.
+        """
+        cursor = self._conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield cursor
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+
     def init_database(self):
         """Initialize the SQLite database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
+        with self._lock, self._transaction() as cursor:
             # Products table
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS products (
@@ -61,132 +91,148 @@ class ReviewDatabase:
                 )
             ''')
 
-            conn.commit()
+            # Dedup key for bulk INSERT OR IGNORE in add_reviews
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_reviews
+                ON reviews (product_id, review_text, reviewer_name)
+            ''')
+
+            # Indexes for the hot lookup paths; products.url already has an
+            # implicit index from its UNIQUE constraint
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS reviews_pid_date
+                ON reviews (product_id, review_date DESC)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS analysis_pid_created
+                ON analysis (product_id, created_at DESC)
+            ''')
+
+            # One analysis row per product; conflict target for the upsert
+            # in save_analysis
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS analysis_pid_ux
+                ON analysis (product_id)
+            ''')
 
     def get_or_create_product(self, url: str, title: str = None, brand: str = None,
                             price: str = None, image_url: str = None) -> int:
         """Get existing product or create new one."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-
-            # Check if product exists
-            cursor.execute('SELECT id FROM products WHERE url = ?', (url,))
+        with self._lock, self._transaction() as cursor:
+            # Single upsert instead of SELECT-then-INSERT/UPDATE; the WHERE
+            # clause skips the row rewrite when no fields were supplied
+            cursor.execute('''
+                INSERT INTO products (url, title, brand, price, image_url)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    title = COALESCE(excluded.title, title),
+                    brand = COALESCE(excluded.brand, brand),
+                    price = COALESCE(excluded.price, price),
+                    image_url = COALESCE(excluded.image_url, image_url),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE excluded.title IS NOT NULL
+                   OR excluded.brand IS NOT NULL
+                   OR excluded.price IS NOT NULL
+                   OR excluded.image_url IS NOT NULL
+                RETURNING id
+            ''', (url, title, brand, price, image_url))
             result = cursor.fetchone()
 
-            if result:
-                product_id = result[0]
-                # Update product info if provided
-                if title or brand or price or image_url:
-                    cursor.execute('''
-                        UPDATE products
-                        SET title = COALESCE(?, title),
-                            brand = COALESCE(?, brand),
-                            price = COALESCE(?, price),
-                            image_url = COALESCE(?, image_url),
-                            updated_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    ''', (title, brand, price, image_url, product_id))
-            else:
-                # Create new product
-                cursor.execute('''
-                    INSERT INTO products (url, title, brand, price, image_url)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (url, title, brand, price, image_url))
-                product_id = cursor.lastrowid
-
-            conn.commit()
-            return product_id
+            if result is None:
+                # Existing product and nothing to update
+                cursor.execute('SELECT id FROM products WHERE url = ?', (url,))
+                result = cursor.fetchone()
+
+        return result[0]
+
+    def get_product_by_url(self, url: str) -> Optional[int]:
+        """Get the product id for a URL, or None if not seen before."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute('SELECT id FROM products WHERE url = ? LIMIT 1', (url,))
+            result = cursor.fetchone()
+            return result[0] if result else None
 
     def add_reviews(self, product_id: int, reviews: List[Dict]) -> int:
         """Add reviews to the database and avoid duplicates."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            added_count = 0
-
-            for review in reviews:
-                # Check if review already exists
-                cursor.execute('''
-                    SELECT id FROM reviews
-                    WHERE product_id = ? AND review_text = ? AND reviewer_name = ?
-                ''', (product_id, review.get('review_text', ''), review.get('reviewer_name', '')))
-
-                if not cursor.fetchone():
-                    cursor.execute('''
-                        INSERT INTO reviews
-                        (product_id, review_text, rating, reviewer_name, review_date,
-                         source_url, sentiment_score, sentiment_label)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        product_id,
-                        review.get('review_text', ''),
-                        review.get('rating'),
-                        review.get('reviewer_name'),
-                        review.get('review_date'),
-                        review.get('source_url'),
-                        review.get('sentiment_score'),
-                        review.get('sentiment_label')
-                    ))
-                    added_count += 1
-
-            conn.commit()
-            return added_count
+        with self._lock:
+            rows = [
+                (
+                    product_id,
+                    review.get('review_text', ''),
+                    review.get('rating'),
+                    review.get('reviewer_name'),
+                    review.get('review_date'),
+                    review.get('source_url'),
+                    review.get('sentiment_score'),
+                    review.get('sentiment_label')
+                )
+                for review in reviews
+            ]
 
-    def save_analysis(self, product_id: int, analysis: Dict):
-        """Save analysis results for a product."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+            changes_before = self._conn.total_changes
+            with self._transaction(immediate=True) as cursor:
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO reviews
+                    (product_id, review_text, rating, reviewer_name, review_date,
+                     source_url, sentiment_score, sentiment_label)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', rows)
 
-            # Delete existing analysis for this product
-            cursor.execute('DELETE FROM analysis WHERE product_id = ?', (product_id,))
+            # total_changes delta counts only rows actually inserted,
+            # i.e. excludes duplicates the unique index ignored
+            return self._conn.total_changes - changes_before
 
-            # Insert new analysis
+    def save_analysis(self, product_id: int, analysis: Dict):
+        """Save analysis results for a product."""
+        with self._lock, self._transaction() as cursor:
+            # Upsert: one analysis row per product, replaced in place
             cursor.execute('''
                 INSERT INTO analysis
                 (product_id, sentiment_distribution, key_insights, pros, cons,
                  rating_summary, total_reviews, average_rating)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (product_id) DO UPDATE SET
+                    sentiment_distribution = excluded.sentiment_distribution,
+                    key_insights = excluded.key_insights,
+                    pros = excluded.pros,
+                    cons = excluded.cons,
+                    rating_summary = excluded.rating_summary,
+                    total_reviews = excluded.total_reviews,
+                    average_rating = excluded.average_rating,
+                    created_at = CURRENT_TIMESTAMP
             ''', (
                 product_id,
-                json.dumps(analysis.get('sentiment_distribution', {})),
-                json.dumps(analysis.get('key_insights', [])),
-                json.dumps(analysis.get('pros', [])),
-                json.dumps(analysis.get('cons', [])),
-                json.dumps(analysis.get('rating_summary', {})),
+                orjson.dumps(analysis.get('sentiment_distribution', {})).decode(),
+                orjson.dumps(analysis.get('key_insights', [])).decode(),
+                orjson.dumps(analysis.get('pros', [])).decode(),
+                orjson.dumps(analysis.get('cons', [])).decode(),
+                orjson.dumps(analysis.get('rating_summary', {})).decode(),
                 analysis.get('total_reviews', 0),
                 analysis.get('average_rating', 0.0)
             ))
 
-            conn.commit()
-
-    def get_reviews(self, product_id: int) -> List[Dict]:
-        """Get all reviews for a product."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+    def get_reviews(self, product_id: int, limit: Optional[int] = None,
+                    offset: int = 0) -> List[Dict]:
+        """Get reviews for a product, optionally paginated."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            # SQLite treats LIMIT -1 as "no limit"
             cursor.execute('''
                 SELECT review_text, rating, reviewer_name, review_date,
                        sentiment_score, sentiment_label
                 FROM reviews
                 WHERE product_id = ?
                 ORDER BY review_date DESC
-            ''', (product_id,))
+                LIMIT ? OFFSET ?
+            ''', (product_id, limit if limit is not None else -1, offset))
 
-            reviews = []
-            for row in cursor.fetchall():
-                reviews.append({
-                    'review_text': row[0],
-                    'rating': row[1],
-                    'reviewer_name': row[2],
-                    'review_date': row[3],
-                    'sentiment_score': row[4],
-                    'sentiment_label': row[5]
-                })
-
-            return reviews
+            return [dict(row) for row in cursor.fetchall()]
 
     def get_analysis(self, product_id: int) -> Optional[Dict]:
         """Get analysis results for a product."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute('''
                 SELECT sentiment_distribution, key_insights, pros, cons,
                        rating_summary, total_reviews, average_rating
@@ -199,20 +245,75 @@ class ReviewDatabase:
             result = cursor.fetchone()
             if result:
                 return {
-                    'sentiment_distribution': json.loads(result[0] or '{}'),
-                    'key_insights': json.loads(result[1] or '[]'),
-                    'pros': json.loads(result[2] or '[]'),
-                    'cons': json.loads(result[3] or '[]'),
-                    'rating_summary': json.loads(result[4] or '{}'),
-                    'total_reviews': result[5],
-                    'average_rating': result[6]
+                    'sentiment_distribution': orjson.loads(result['sentiment_distribution']) if result['sentiment_distribution'] else {},
+                    'key_insights': orjson.loads(result['key_insights']) if result['key_insights'] else [],
+                    'pros': orjson.loads(result['pros']) if result['pros'] else [],
+                    'cons': orjson.loads(result['cons']) if result['cons'] else [],
+                    'rating_summary': orjson.loads(result['rating_summary']) if result['rating_summary'] else {},
+                    'total_reviews': result['total_reviews'],
+                    'average_rating': result['average_rating']
                 }
             return None
 
+    def get_cached_bundle(self, product_id: int,
+                          review_limit: Optional[int] = None) -> Optional[Dict]:
+        """Get product info, analysis, and reviews in one round-trip.
+
+        Returns a dict with 'product_info', 'analysis', and 'reviews' keys,
+        or None when no analysis has been saved for the product yet.
+        """
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute('''
+                SELECT p.url, p.title, p.brand, p.price, p.image_url, p.created_at,
+                       a.sentiment_distribution, a.key_insights, a.pros, a.cons,
+                       a.rating_summary, a.total_reviews, a.average_rating
+                FROM products p
+                JOIN analysis a ON a.product_id = p.id
+                WHERE p.id = ?
+                ORDER BY a.created_at DESC
+                LIMIT 1
+            ''', (product_id,))
+
+            result = cursor.fetchone()
+            if not result:
+                return None
+
+            cursor.execute('''
+                SELECT review_text, rating, reviewer_name, review_date,
+                       sentiment_score, sentiment_label
+                FROM reviews
+                WHERE product_id = ?
+                ORDER BY review_date DESC
+                LIMIT ?
+            ''', (product_id, review_limit if review_limit is not None else -1))
+            reviews = [dict(row) for row in cursor.fetchall()]
+
+            return {
+                'product_info': {
+                    'url': result['url'],
+                    'title': result['title'],
+                    'brand': result['brand'],
+                    'price': result['price'],
+                    'image_url': result['image_url'],
+                    'created_at': result['created_at']
+                },
+                'analysis': {
+                    'sentiment_distribution': orjson.loads(result['sentiment_distribution']) if result['sentiment_distribution'] else {},
+                    'key_insights': orjson.loads(result['key_insights']) if result['key_insights'] else [],
+                    'pros': orjson.loads(result['pros']) if result['pros'] else [],
+                    'cons': orjson.loads(result['cons']) if result['cons'] else [],
+                    'rating_summary': orjson.loads(result['rating_summary']) if result['rating_summary'] else {},
+                    'total_reviews': result['total_reviews'],
+                    'average_rating': result['average_rating']
+                },
+                'reviews': reviews
+            }
+
     def get_product_info(self, product_id: int) -> Optional[Dict]:
         """Get product information."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute('''
                 SELECT url, title, brand, price, image_url, created_at
                 FROM products
@@ -221,40 +322,40 @@ class ReviewDatabase:
 
             result = cursor.fetchone()
             if result:
-                return {
-                    'url': result[0],
-                    'title': result[1],
-                    'brand': result[2],
-                    'price': result[3],
-                    'image_url': result[4],
-                    'created_at': result[5]
-                }
+                return dict(result)
             return None
 
     def get_recent_products(self, limit: int = 10) -> List[Dict]:
         """Get recently analyzed products."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._lock:
+            cursor = self._conn.cursor()
             cursor.execute('''
-                SELECT p.id, p.url, p.title, p.brand, p.price, a.total_reviews,
-                       a.average_rating, p.created_at
+                SELECT p.id, p.url, p.title, p.brand, p.price,
+                       COALESCE(a.total_reviews, 0) AS total_reviews,
+                       COALESCE(a.average_rating, 0.0) AS average_rating,
+                       p.created_at
                 FROM products p
                 LEFT JOIN analysis a ON p.id = a.product_id
                 ORDER BY p.created_at DESC
                 LIMIT ?
             ''', (limit,))
 
-            products = []
-            for row in cursor.fetchall():
-                products.append({
-                    'id': row[0],
-                    'url': row[1],
-                    'title': row[2],
-                    'brand': row[3],
-                    'price': row[4],
-                    'total_reviews': row[5] or 0,
-                    'average_rating': row[6] or 0.0,
-                    'created_at': row[7]
-                })
-
-            return products
\ No newline at end of file
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_recent_products_df(self, limit: int = 10) -> pd.DataFrame:
+        """Get recently analyzed products as a typed DataFrame.
+
+        Lets pandas materialize columns straight from the cursor instead of
+        building a list of dicts row by row in Python.
+        """
+        with self._lock:
+            return pd.read_sql_query('''
+                SELECT p.id, p.url, p.title, p.brand, p.price,
+                       COALESCE(a.total_reviews, 0) AS total_reviews,
+                       COALESCE(a.average_rating, 0.0) AS average_rating,
+                       p.created_at
+                FROM products p
+                LEFT JOIN analysis a ON p.id = a.product_id
+                ORDER BY p.created_at DESC
+                LIMIT ?
+            ''', self._conn, params=(limit,), parse_dates=['created_at'])
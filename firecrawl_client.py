@@ -1,13 +1,97 @@
 import os
 import re
-import json
+import time
+import orjson
+import asyncio
+from functools import lru_cache
 from typing import List, Dict, Optional
 from urllib.parse import urljoin, urlparse
-import requests
+import httpx
+import xxhash
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Transient statuses worth retrying with backoff
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# Fail fast on dead endpoints, allow slow scrapes to finish
+_TIMEOUT = httpx.Timeout(30.0, connect=3.05)
+
+# Patterns are compiled once at import; these run per line of scraped
+# content, so per-call re.search pattern lookups add up quickly.
+# The rating formats are fused into one alternation so each line costs a
+# single regex dispatch; the matched group name says which format hit.
+_RATING_ANY = re.compile(
+    r'(?:(?P<stars>\d+(?:\.\d+)?)\s*stars?)'
+    r'|(?:Rating[:\s]*(?P<rnum>\d+(?:\.\d+)?))'
+    r'|(?:(?P<frac>\d+)/5)'
+    r'|(?P<sym>★{1,5})',
+    re.IGNORECASE
+)
+
+_RATING_NUMERIC = re.compile(r'(\d+(?:\.\d+)?)')
+
+_REVIEWER_PATTERNS = [
+    re.compile(p)
+    for p in (
+        r'by\s+([A-Z][a-z]+\s+[A-Z][a-z]+)',
+        r'-\s*([A-Z][a-z]+\s+[A-Z][a-z]+)',
+        r'([A-Z][a-z]+\s+[A-Z][a-z]+)\s*said',
+    )
+]
+
+_DATE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r'(\d{1,2}/\d{1,2}/\d{4})',
+        r'(\d{1,2}-\d{1,2}-\d{4})',
+        r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}',
+        r'(\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4})'
+    )
+]
+
+@lru_cache(maxsize=1024)
+def _extract_product_info(url: str) -> Dict:
+    """Extract basic product information from a URL, memoized per URL."""
+    try:
+        parsed = urlparse(url)
+        path_parts = parsed.path.split('/')
+
+        # Try to extract product name from path
+        product_name = None
+        for part in path_parts:
+            if len(part) > 3 and not part.isdigit():
+                product_name = part.replace('-', ' ').replace('_', ' ')
+                break
+
+        # Try to extract brand from common patterns; a substring check is
+        # all the /dp/ detection needs, no regex required
+        brand = None
+        if 'amazon' in parsed.netloc and '/dp/' in parsed.path:
+            brand = "Amazon Product"
+
+        return {
+            'name': product_name,
+            'brand': brand,
+            'domain': parsed.netloc
+        }
+    except:
+        return {'name': None, 'brand': None, 'domain': None}
+
+
+# Matches trimmed lines of at least 10 characters, replacing the Python
+# split/strip/length pipeline with one C-level scan over the document
+_MEANINGFUL_LINES = re.compile(r'^[ \t]*(\S.{8,}?\S)[ \t\r]*$', re.MULTILINE)
+
+# Single-pass keyword scan instead of one substring search per indicator;
+# case-insensitive so callers don't need to lowercase each line first
+_INDICATORS_RE = re.compile(
+    r"\b(?:great|good|bad|excellent|poor|love|hate|recommend|quality|price|"
+    r"service|delivery|package|product|item|worked|didn't work)\b",
+    re.IGNORECASE
+)
+
 class FirecrawlClient:
     def __init__(self):
         self.api_key = os.getenv('FIRECRAWL_API_KEY')
@@ -20,22 +104,53 @@ class FirecrawlClient:
             'Content-Type': 'application/json'
         }
 
+        # Pooled HTTP/2 client: keepalive avoids a TLS handshake per call
+        # and HTTP/2 multiplexes concurrent requests over one connection
+        self.http = httpx.Client(
+            http2=True,
+            headers=self.headers,
+            timeout=_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            transport=httpx.HTTPTransport(retries=3)
+        )
+
+    def _post_with_retry(self, url: str, payload: Dict, retries: int = 3) -> httpx.Response:
+        """POST with exponential backoff on transient failures.
+
+        Retrying here reuses the warm connection instead of surfacing the
+        error and re-entering the whole pipeline from a higher layer.
+        """
+        for attempt in range(retries):
+            try:
+                response = self.http.post(url, json=payload)
+                if response.status_code not in _RETRY_STATUS:
+                    return response
+            except httpx.HTTPError:
+                if attempt == retries - 1:
+                    raise
+            if attempt < retries - 1:
+                time.sleep(0.5 * (2 ** attempt))
+
+        return response
+
     def search_reviews(self, product_url: str, max_results: int = 10) -> List[str]:
         """Search for review pages related to the product."""
         try:
             # Extract product name/brand from URL for better search
             product_info = self._extract_product_info(product_url)
+            search_queries = self._build_search_queries(product_info)
 
-            # Construct search queries
-            search_queries = [
-                f"{product_info.get('name', '')} reviews",
-                f"{product_info.get('brand', '')} {product_info.get('name', '')} customer reviews",
-                f"{product_info.get('name', '')} user feedback rating"
-            ]
+            # Nothing meaningful to search for
+            if not search_queries:
+                return []
 
-            review_urls = []
+            review_urls = set()
 
             for query in search_queries:
+                # Enough unique URLs already; skip the remaining queries
+                if len(review_urls) >= max_results:
+                    break
+
                 try:
                     # Use Firecrawl search API
                     search_url = f"{self.base_url}/search"
@@ -48,20 +163,19 @@ class FirecrawlClient:
                         }
                     }
 
-                    response = requests.post(search_url, headers=self.headers, json=payload)
+                    response = self._post_with_retry(search_url, payload)
 
                     if response.status_code == 200:
-                        results = response.json()
+                        results = orjson.loads(response.content)
                         if 'data' in results and results['data']:
                             for item in results['data']:
                                 if 'url' in item:
-                                    review_urls.append(item['url'])
+                                    review_urls.add(item['url'])
                 except Exception as e:
                     print(f"Search error for query '{query}': {str(e)}")
                     continue
 
-            # Remove duplicates and return
-            return list(set(review_urls))
+            return list(review_urls)
 
         except Exception as e:
             print(f"Error searching for reviews: {str(e)}")
@@ -80,10 +194,10 @@ class FirecrawlClient:
                 "excludeTags": ["script", "style", "nav", "footer", "header"]
             }
 
-            response = requests.post(scrape_url, headers=self.headers, json=payload)
+            response = self._post_with_retry(scrape_url, payload)
 
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 if 'data' in result:
                     return {
                         'url': url,
@@ -100,100 +214,66 @@ class FirecrawlClient:
         """Extract individual reviews from scraped content."""
         reviews = []
 
-        # Common review patterns
-        review_patterns = [
-            r'(\d+(?:\.\d+)?)\s*stars?\s*(.*?)(?=\d+(?:\.\d+)?\s*stars?|$)',
-            r'Rating[:\s]*(\d+(?:\.\d+)?)[\s\S]*?(.*?)(?=Rating[:\s]*\d+(?:\.\d+)?|$)',
-            r'(\d+)\/5\s*(.*?)(?=\d+\/5|$)',
-            r'★{1,5}\s*(.*?)(?=★{1,5}|$)'
-        ]
-
-        # Split content into potential review sections
-        lines = content.split('\n')
-        current_review = ""
+        # Iterate meaningful lines without splitting the whole document;
+        # review text is accumulated as a list of lines and joined once per
+        # review, since repeated string concatenation is quadratic in
+        # review length
+        current_review_parts = []
         current_rating = None
 
-        for i, line in enumerate(lines):
-            line = line.strip()
-            if not line or len(line) < 10:
-                continue
+        def flush_review():
+            review_text = " ".join(current_review_parts).strip()
+            reviews.append({
+                'review_text': review_text,
+                'rating': self._normalize_rating(current_rating),
+                'reviewer_name': self._extract_reviewer_name(review_text),
+                'review_date': self._extract_review_date(review_text),
+                'source_url': source_url
+            })
+
+        for line_match in _MEANINGFUL_LINES.finditer(content):
+            line = line_match.group(1)
 
             # Look for ratings
-            rating_match = None
-            for pattern in review_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    rating_match = match
-                    break
+            rating_match = _RATING_ANY.search(line)
 
             if rating_match:
                 # Save previous review if exists
-                if current_review and current_rating:
-                    reviews.append({
-                        'review_text': current_review.strip(),
-                        'rating': self._normalize_rating(current_rating),
-                        'reviewer_name': self._extract_reviewer_name(current_review),
-                        'review_date': self._extract_review_date(current_review),
-                        'source_url': source_url
-                    })
+                if current_review_parts and current_rating:
+                    flush_review()
 
                 # Start new review
-                current_rating = rating_match.group(1)
-                current_review = rating_match.group(2) if len(rating_match.groups()) > 1 else line
+                if rating_match.lastgroup == 'sym':
+                    # Star symbols: the rating is the symbol count
+                    current_rating = str(len(rating_match.group('sym')))
+                else:
+                    current_rating = rating_match.group(rating_match.lastgroup)
+                rest = line[rating_match.end():].strip()
+                current_review_parts = [rest if rest else line]
             else:
                 # Continue current review
-                if current_review:
-                    current_review += " " + line
+                if current_review_parts:
+                    current_review_parts.append(line)
                 else:
                     # Check if this looks like a review
                     if self._is_likely_review(line):
-                        current_review = line
+                        current_review_parts = [line]
 
         # Don't forget the last review
-        if current_review and current_rating:
-            reviews.append({
-                'review_text': current_review.strip(),
-                'rating': self._normalize_rating(current_rating),
-                'reviewer_name': self._extract_reviewer_name(current_review),
-                'review_date': self._extract_review_date(current_review),
-                'source_url': source_url
-            })
+        if current_review_parts and current_rating:
+            flush_review()
 
         return reviews
 
     def _extract_product_info(self, url: str) -> Dict:
         """Extract basic product information from URL."""
-        try:
-            parsed = urlparse(url)
-            path_parts = parsed.path.split('/')
-
-            # Try to extract product name from path
-            product_name = None
-            for part in path_parts:
-                if len(part) > 3 and not part.isdigit():
-                    product_name = part.replace('-', ' ').replace('_', ' ')
-                    break
-
-            # Try to extract brand from common patterns
-            brand = None
-            if 'amazon' in parsed.netloc:
-                brand_match = re.search(r'/dp/([A-Z0-9]+)', url)
-                if brand_match:
-                    brand = "Amazon Product"
-
-            return {
-                'name': product_name,
-                'brand': brand,
-                'domain': parsed.netloc
-            }
-        except:
-            return {'name': None, 'brand': None, 'domain': None}
+        return _extract_product_info(url)
 
     def _normalize_rating(self, rating: str) -> Optional[float]:
         """Normalize rating to 1-5 scale."""
         try:
             # Extract numeric rating
-            rating_match = re.search(r'(\d+(?:\.\d+)?)', str(rating))
+            rating_match = _RATING_NUMERIC.search(str(rating))
             if rating_match:
                 rating_value = float(rating_match.group(1))
 
@@ -210,14 +290,8 @@ class FirecrawlClient:
 
     def _extract_reviewer_name(self, review_text: str) -> Optional[str]:
         """Extract reviewer name from review text."""
-        patterns = [
-            r'by\s+([A-Z][a-z]+\s+[A-Z][a-z]+)',
-            r'-\s*([A-Z][a-z]+\s+[A-Z][a-z]+)',
-            r'([A-Z][a-z]+\s+[A-Z][a-z]+)\s*said',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, review_text)
+        for pattern in _REVIEWER_PATTERNS:
+            match = pattern.search(review_text)
             if match:
                 return match.group(1)
 
@@ -225,15 +299,8 @@ class FirecrawlClient:
 
     def _extract_review_date(self, review_text: str) -> Optional[str]:
         """Extract review date from review text."""
-        patterns = [
-            r'(\d{1,2}/\d{1,2}/\d{4})',
-            r'(\d{1,2}-\d{1,2}-\d{4})',
-            r'(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}',
-            r'(\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4})'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, review_text, re.IGNORECASE)
+        for pattern in _DATE_PATTERNS:
+            match = pattern.search(review_text)
             if match:
                 return match.group(1)
 
@@ -241,52 +308,161 @@ class FirecrawlClient:
 
     def _is_likely_review(self, text: str) -> bool:
         """Check if text is likely a review."""
-        review_indicators = [
-            'great', 'good', 'bad', 'excellent', 'poor', 'love', 'hate',
-            'recommend', 'quality', 'price', 'service', 'delivery',
-            'package', 'product', 'item', 'worked', 'didn\'t work'
-        ]
-
-        text_lower = text.lower()
-        indicator_count = sum(1 for indicator in review_indicators if indicator in text_lower)
+        indicator_count = len(_INDICATORS_RE.findall(text))
 
         # Also check length and sentence structure
         word_count = len(text.split())
 
         return (indicator_count >= 2 and word_count >= 10) or (indicator_count >= 1 and word_count >= 20)
 
-    def get_product_reviews(self, product_url: str, max_pages: int = 5) -> List[Dict]:
-        """Get all reviews for a product."""
-        all_reviews = []
+    async def _search_query_async(self, client: httpx.AsyncClient, query: str,
+                                  max_results: int) -> List[str]:
+        """Run one search query and return the result URLs."""
+        payload = {
+            "query": query,
+            "limit": max_results,
+            "scrapeOptions": {
+                "formats": ["markdown"],
+                "onlyMainContent": True
+            }
+        }
+
+        try:
+            response = await client.post(f"{self.base_url}/search", json=payload)
+            if response.status_code == 200:
+                results = orjson.loads(response.content)
+                if 'data' in results and results['data']:
+                    return [item['url'] for item in results['data'] if 'url' in item]
+        except Exception as e:
+            print(f"Search error for query '{query}': {str(e)}")
+
+        return []
 
-        # Search for review pages
-        review_urls = self.search_reviews(product_url, max_pages)
+    def _build_search_queries(self, product_info: Dict) -> List[str]:
+        """Build search queries, skipping ones with no real content.
+
+        When no product name could be extracted, every query degenerates to
+        boilerplate like ' reviews' and just wastes API calls, so none are
+        issued at all.
+        """
+        name = product_info.get('name')
+        if not name:
+            return []
+
+        queries = [f"{name} reviews"]
+        if product_info.get('brand'):
+            queries.append(f"{product_info['brand']} {name} customer reviews")
+        queries.append(f"{name} user feedback rating")
+
+        return queries
+
+    async def search_reviews_async(self, client: httpx.AsyncClient, product_url: str,
+                                   max_results: int = 10) -> List[str]:
+        """Search for review pages, issuing all queries concurrently."""
+        product_info = self._extract_product_info(product_url)
+        search_queries = self._build_search_queries(product_info)
+
+        if not search_queries:
+            return []
+
+        results = await asyncio.gather(*[
+            self._search_query_async(client, query, max_results)
+            for query in search_queries
+        ])
+
+        # Remove duplicates and return
+        return list({url for urls in results for url in urls})
+
+    async def _scrape_reviews_async(self, client: httpx.AsyncClient, url: str,
+                                    semaphore: asyncio.Semaphore) -> Dict:
+        """Scrape review content from a URL with bounded concurrency."""
+        payload = {
+            "url": url,
+            "formats": ["markdown"],
+            "onlyMainContent": True,
+            "waitFor": 2000,  # Wait 2 seconds for dynamic content
+            "includeTags": ["div", "span", "p", "article", "section"],
+            "excludeTags": ["script", "style", "nav", "footer", "header"]
+        }
 
-        if not review_urls:
-            # Try to scrape the product page directly for reviews
-            scraped = self.scrape_reviews(product_url)
+        async with semaphore:
+            last_error = None
+            for attempt in range(3):
+                try:
+                    response = await client.post(f"{self.base_url}/scrape", json=payload)
+
+                    if response.status_code == 200:
+                        result = orjson.loads(response.content)
+                        if 'data' in result:
+                            return {
+                                'url': url,
+                                'content': result['data'].get('markdown', ''),
+                                'success': True
+                            }
+                        return {'url': url, 'content': '', 'success': False, 'error': 'No data in response'}
+
+                    last_error = f"HTTP {response.status_code}"
+                    if response.status_code not in _RETRY_STATUS:
+                        break
+                except Exception as e:
+                    last_error = str(e)
+
+                # Exponential backoff before retrying transient failures
+                if attempt < 2:
+                    await asyncio.sleep(0.5 * (2 ** attempt))
+
+            return {'url': url, 'content': '', 'success': False, 'error': last_error}
+
+    async def get_product_reviews_async(self, product_url: str, max_pages: int = 5) -> List[Dict]:
+        """Get all reviews for a product, searching and scraping concurrently."""
+        all_reviews = []
+
+        semaphore = asyncio.Semaphore(10)
+        # HTTP/2 so the concurrent scrapes multiplex over one TCP+TLS
+        # connection instead of opening one per URL
+        async with httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=_TIMEOUT,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+        ) as client:
+            review_urls = await self.search_reviews_async(client, product_url, max_pages)
+
+            # Fall back to the product page itself when search finds nothing
+            urls_to_scrape = review_urls[:max_pages] if review_urls else [product_url]
+
+            scraped_pages = await asyncio.gather(*[
+                self._scrape_reviews_async(client, url, semaphore)
+                for url in urls_to_scrape
+            ])
+
+        for scraped in scraped_pages:
             if scraped['success']:
-                reviews = self.extract_reviews_from_content(scraped['content'], product_url)
+                reviews = self.extract_reviews_from_content(scraped['content'], scraped['url'])
                 all_reviews.extend(reviews)
-        else:
-            # Scrape each review URL
-            for review_url in review_urls[:max_pages]:
-                scraped = self.scrape_reviews(review_url)
-                if scraped['success']:
-                    reviews = self.extract_reviews_from_content(scraped['content'], review_url)
-                    all_reviews.extend(reviews)
-
-        # Remove duplicates based on review text similarity
+
+        return self._dedupe_reviews(all_reviews)
+
+    def get_product_reviews(self, product_url: str, max_pages: int = 5) -> List[Dict]:
+        """Get all reviews for a product."""
+        return asyncio.run(self.get_product_reviews_async(product_url, max_pages))
+
+    def _dedupe_reviews(self, all_reviews: List[Dict]) -> List[Dict]:
+        """Remove duplicates based on review text similarity."""
         unique_reviews = []
-        seen_texts = set()
+        seen_hashes = set()
 
         for review in all_reviews:
             review_text = review.get('review_text', '').strip()
             if review_text and len(review_text) > 20:
-                # Simple deduplication based on first 100 characters
-                text_key = review_text[:100].lower()
-                if text_key not in seen_texts:
-                    seen_texts.add(text_key)
+                # Simple deduplication based on first 100 characters;
+                # a 64-bit hash keeps the seen-set at 8 bytes per entry
+                # instead of retaining the substrings themselves
+                text_hash = xxhash.xxh3_64_intdigest(
+                    review_text[:100].lower().encode('utf-8', 'ignore')
+                )
+                if text_hash not in seen_hashes:
+                    seen_hashes.add(text_hash)
                     unique_reviews.append(review)
 
         return unique_reviews
\ No newline at end of file
@@ -1,18 +1,36 @@
 import os
-import json
+import hashlib
+import orjson
 from typing import List, Dict, Optional
 from collections import Counter
+import numpy as np
+import httpx
 import openai
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Reviews per sentiment request; one LLM call covers a whole batch
+_SENTIMENT_BATCH_SIZE = 20
+
 class ReviewAnalyzer:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        # HTTP/2 client so the batched sentiment calls multiplex over one
+        # keepalive connection to the API
+        self.client = openai.OpenAI(
+            api_key=os.getenv('OPENAI_API_KEY'),
+            http_client=httpx.Client(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=20)
+            )
+        )
         if not self.client.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
 
+        # Sentiment results keyed by review-text hash, so re-analyzing the
+        # same product never re-pays the LLM call for identical text
+        self._sentiment_cache: Dict[bytes, Dict] = {}
+
     def analyze_reviews(self, reviews: List[Dict]) -> Dict:
         """Analyze reviews and provide comprehensive insights."""
         if not reviews:
@@ -27,17 +45,28 @@ class ReviewAnalyzer:
                 'recommendations': []
             }
 
-        # Perform sentiment analysis on each review
-        analyzed_reviews = []
-        for review in reviews:
-            sentiment_result = self._analyze_sentiment(review.get('review_text', ''))
-            review.update(sentiment_result)
-            analyzed_reviews.append(review)
+        # Reviews loaded from the database already carry sentiment; only
+        # send the unlabeled ones through the LLM
+        analyzed_reviews = [r for r in reviews if r.get('sentiment_label')]
+        pending = [r for r in reviews if not r.get('sentiment_label')]
+
+        # Perform sentiment analysis in batches of reviews per LLM call
+        for start in range(0, len(pending), _SENTIMENT_BATCH_SIZE):
+            batch = pending[start:start + _SENTIMENT_BATCH_SIZE]
+            sentiments = self._analyze_sentiment_batch(
+                [review.get('review_text', '') for review in batch]
+            )
+            for review, sentiment_result in zip(batch, sentiments):
+                review.update(sentiment_result)
+                analyzed_reviews.append(review)
 
-        # Calculate overall metrics
+        # Calculate overall metrics with vectorized aggregation
         total_reviews = len(analyzed_reviews)
-        ratings = [r.get('rating') for r in analyzed_reviews if r.get('rating') is not None]
-        average_rating = sum(ratings) / len(ratings) if ratings else 0.0
+        ratings = np.fromiter(
+            (r['rating'] for r in analyzed_reviews if r.get('rating') is not None),
+            dtype=np.float64
+        )
+        average_rating = float(ratings.mean()) if ratings.size else 0.0
 
         # Get sentiment distribution
         sentiment_distribution = self._calculate_sentiment_distribution(analyzed_reviews)
@@ -58,42 +87,69 @@ class ReviewAnalyzer:
 
     def _analyze_sentiment(self, text: str) -> Dict:
         """Analyze sentiment of a single review."""
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Analyze the sentiment of the following review. Return a JSON object with 'sentiment' (positive, negative, or neutral) and 'score' (0-1, where 0 is very negative and 1 is very positive)."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Review: {text}"
-                    }
-                ],
-                response_format={"type": "json_object"}
+        return self._analyze_sentiment_batch([text])[0]
+
+    def _analyze_sentiment_batch(self, texts: List[str]) -> List[Dict]:
+        """Analyze sentiment of multiple reviews with one LLM call."""
+        keys = [
+            hashlib.blake2b(text.encode('utf-8', 'ignore'), digest_size=16).digest()
+            for text in texts
+        ]
+        missing = [i for i, key in enumerate(keys) if key not in self._sentiment_cache]
+
+        if missing:
+            numbered_reviews = "\n".join(
+                f"{n + 1}) {texts[i]}" for n, i in enumerate(missing)
             )
 
-            result = json.loads(response.choices[0].message.content)
-            return {
-                'sentiment_label': result.get('sentiment', 'neutral'),
-                'sentiment_score': result.get('score', 0.5)
-            }
+            try:
+                response = self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "Analyze the sentiment of each numbered review. Return a JSON object {\"results\": [{\"sentiment\": ..., \"score\": ...}, ...]} with one entry per review, in order. 'sentiment' is positive, negative, or neutral; 'score' is 0-1, where 0 is very negative and 1 is very positive."
+                        },
+                        {
+                            "role": "user",
+                            "content": f"Reviews:\n{numbered_reviews}"
+                        }
+                    ],
+                    response_format={"type": "json_object"}
+                )
+
+                results = orjson.loads(response.choices[0].message.content).get('results', [])
+
+            except Exception as e:
+                print(f"Sentiment analysis error: {str(e)}")
+                results = []
+
+            # Cache only what the model actually returned; failures fall
+            # back to neutral below without poisoning the cache
+            for n, i in enumerate(missing):
+                if n < len(results):
+                    result = results[n]
+                    self._sentiment_cache[keys[i]] = {
+                        'sentiment_label': result.get('sentiment', 'neutral'),
+                        'sentiment_score': result.get('score', 0.5)
+                    }
 
-        except Exception as e:
-            print(f"Sentiment analysis error: {str(e)}")
-            return {
-                'sentiment_label': 'neutral',
-                'sentiment_score': 0.5
-            }
+        return [
+            self._sentiment_cache.get(
+                key, {'sentiment_label': 'neutral', 'sentiment_score': 0.5}
+            )
+            for key in keys
+        ]
 
     def _generate_insights(self, reviews: List[Dict]) -> Dict:
         """Generate comprehensive insights from reviews."""
-        # Prepare reviews text for analysis
-        reviews_text = "\n".join([
-            f"Review {i+1}: {review.get('review_text', '')} (Rating: {review.get('rating', 'N/A')})"
-            for i, review in enumerate(reviews[:50])  # Limit to first 50 reviews for token limit
-        ])
+        # Compact JSONL payload ('r' = review text, 's' = star rating)
+        # instead of the verbose per-review preamble; cuts input tokens
+        # noticeably over 50 reviews. Limit to first 50 for token limit.
+        reviews_payload = b"\n".join(
+            orjson.dumps({"r": review.get('review_text', ''), "s": review.get('rating')})
+            for review in reviews[:50]
+        ).decode()
 
         try:
             response = self.client.chat.completions.create(
@@ -101,7 +157,7 @@ class ReviewAnalyzer:
                 messages=[
                     {
                         "role": "system",
-                        "content": """You are an expert product analyst. Analyze the following product reviews and provide insights in JSON format:
+                        "content": """You are an expert product analyst. The user sends one JSON object per line with 'r' (review text) and 's' (star rating). Analyze the reviews and provide insights in JSON format:
                         {
                             "key_insights": ["insight 1", "insight 2", ...],
                             "pros": ["pro 1", "pro 2", ...],
@@ -118,13 +174,21 @@ class ReviewAnalyzer:
                     },
                     {
                         "role": "user",
-                        "content": f"Analyze these product reviews:\n\n{reviews_text}"
+                        "content": f"Analyze these product reviews:\n\n{reviews_payload}"
                     }
                 ],
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                stream=True
             )
 
-            return json.loads(response.choices[0].message.content)
+            # Accumulate the stream so work starts on the first byte rather
+            # than waiting for the full completion to be buffered server-side
+            content_parts = []
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    content_parts.append(chunk.choices[0].delta.content)
+
+            return orjson.loads("".join(content_parts))
 
         except Exception as e:
             print(f"Insights generation error: {str(e)}")
@@ -147,20 +211,21 @@ class ReviewAnalyzer:
             'neutral': round((sentiment_counts.get('neutral', 0) / total) * 100, 1) if total > 0 else 0
         }
 
-    def _calculate_rating_summary(self, ratings: List[float]) -> Dict:
+    def _calculate_rating_summary(self, ratings: np.ndarray) -> Dict:
         """Calculate rating distribution and statistics."""
-        if not ratings:
+        if not ratings.size:
             return {}
 
-        rating_counts = Counter([int(r) for r in ratings if r])
-        total_ratings = len(ratings)
+        # One bincount pass instead of a Python counting loop
+        rating_counts = np.bincount(ratings.astype(np.int64), minlength=6)
+        total_ratings = int(ratings.size)
 
         return {
-            '5_star': round((rating_counts.get(5, 0) / total_ratings) * 100, 1),
-            '4_star': round((rating_counts.get(4, 0) / total_ratings) * 100, 1),
-            '3_star': round((rating_counts.get(3, 0) / total_ratings) * 100, 1),
-            '2_star': round((rating_counts.get(2, 0) / total_ratings) * 100, 1),
-            '1_star': round((rating_counts.get(1, 0) / total_ratings) * 100, 1),
+            '5_star': round((int(rating_counts[5]) / total_ratings) * 100, 1),
+            '4_star': round((int(rating_counts[4]) / total_ratings) * 100, 1),
+            '3_star': round((int(rating_counts[3]) / total_ratings) * 100, 1),
+            '2_star': round((int(rating_counts[2]) / total_ratings) * 100, 1),
+            '1_star': round((int(rating_counts[1]) / total_ratings) * 100, 1),
             'total_ratings': total_ratings
         }
 
@@ -216,7 +281,7 @@ class ReviewAnalyzer:
             # Generate comparison insights
             comparison_prompt = f"""
             Compare these products based on their review analysis:
-            {json.dumps(comparison_data, indent=2)}
+            {orjson.dumps(comparison_data, option=orjson.OPT_INDENT_2).decode()}
 
             Provide a JSON comparison with:
             {{
@@ -243,7 +308,7 @@ class ReviewAnalyzer:
                 response_format={"type": "json_object"}
             )
 
-            comparison_result = json.loads(response.choices[0].message.content)
+            comparison_result = orjson.loads(response.choices[0].message.content)
             comparison_result['product_data'] = comparison_data
 
             return comparison_result